@@ -8,35 +8,341 @@ description: File management tools.
 """
 
 from pathlib import Path
+import os
 import shutil
 import logging
 import datetime
-
-
-logging.basicConfig(level=logging.INFO)
+import mmap
+import errno
+import io
+import stat
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from enum import IntEnum
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+
+# Настройка обработчиков и уровня остается за приложением
+logger = logging.getLogger(__name__)
+
+
+def _walk_files(top):
+    """
+    Recursively yield the files under a directory.
+    Uses an explicit stack of os.scandir iterators and the entry types they already carry,
+    so no Path objects are built and only symlinks need an extra stat.
+    Symlinked directories are not descended into, missing or unreadable directories are skipped.
+    :param top: Path to the directory to walk.
+    :return: A generator of (path, name) tuples for every file found.
+    """
+    pending_dirs = [top]
+    while pending_dirs:
+        try:
+            entries = os.scandir(pending_dirs.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending_dirs.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.name
+
+
+def _file_contains(file_path, keyword_bytes: bytes) -> bool:
+    """
+    Check whether the raw content of a file contains the keyword.
+    The file is memory-mapped and searched with mmap.find, so nothing is decoded or copied into Python objects.
+    :param file_path: Path to the file to scan.
+    :param keyword_bytes: The encoded keyword to search for.
+    :return: True if the keyword occurs in the file, False otherwise.
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        # Skip files that can't be read
+        return False
+    try:
+        # Пустой файл нельзя отобразить в память, и ключевого слова в нем нет
+        if os.fstat(fd).st_size == 0:
+            return False
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            return mapped.find(keyword_bytes) != -1
+    except (OSError, ValueError):
+        return False
+    finally:
+        os.close(fd)
+
+
+# Сколько байт read_file возвращает по умолчанию и чем помечает обрезанный файл
+_READ_LIMIT = 1 << 20
+_TRUNCATED_MARKER = "\n...[truncated]"
+
+# Флаги открытия файла на перезапись
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+
+# Число потоков для проверки содержимого файлов в search_files
+_SEARCH_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Размер порции для copy_file_range и буфера запасного цикла read/write
+_COPY_CHUNK_SIZE = 1 << 30
+_COPY_BUFFER_SIZE = 1 << 20
+
+# Ошибки, при которых copy_file_range или sendfile не поддерживаются для пары файлов
+_COPY_UNSUPPORTED_ERRORS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+
+def _try_kernel_copy(copy_chunk) -> bool:
+    """
+    Run a kernel-side copy until it reports the end of the source file.
+    :param copy_chunk: Callable that copies the next chunk and returns the number of bytes copied.
+    :return: True if the copy finished, False if the kernel or filesystem does not support it.
+    """
+    try:
+        while copy_chunk():
+            pass
+    except OSError as error:
+        if error.errno not in _COPY_UNSUPPORTED_ERRORS:
+            raise
+        return False
+    return True
+
+
+def _copy_fd_buffered(src_fd: int, dest_fd: int) -> None:
+    """
+    Copy the remaining content of one file descriptor to another through a reusable 1 MiB buffer.
+    :param src_fd: Descriptor of the source file opened for reading.
+    :param dest_fd: Descriptor of the destination file opened for writing.
+    """
+    buffer = bytearray(_COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with io.FileIO(src_fd, "rb", closefd=False) as src:
+        while True:
+            read = src.readinto(buffer)
+            if not read:
+                return
+            written = 0
+            while written < read:
+                written += os.write(dest_fd, view[written:read])
+
+
+def _copy_fd(src_fd: int, dest_fd: int) -> None:
+    """
+    Copy the remaining content of one file descriptor to another.
+    Uses os.copy_file_range where available, which lets the kernel reflink on CoW filesystems
+    and copy server-side on NFS, then os.sendfile, which still keeps the data in the kernel,
+    and finally a read/write loop through a reusable 1 MiB buffer.
+    :param src_fd: Descriptor of the source file opened for reading.
+    :param dest_fd: Descriptor of the destination file opened for writing.
+    """
+    if hasattr(os, "copy_file_range") and _try_kernel_copy(
+        lambda: os.copy_file_range(src_fd, dest_fd, _COPY_CHUNK_SIZE)
+    ):
+        return
+    if hasattr(os, "sendfile") and _try_kernel_copy(lambda: os.sendfile(dest_fd, src_fd, None, _COPY_CHUNK_SIZE)):
+        return
+    # Смещения обоих дескрипторов уже сдвинуты на скопированную часть, продолжаем с них
+    _copy_fd_buffered(src_fd, dest_fd)
+
+
+def _fast_copy(src, dest):
+    """
+    Copy a file with its metadata, like shutil.copy2.
+    :param src: Path to the source file.
+    :param dest: Path to the destination file or directory.
+    :return: The path of the created copy.
+    """
+    if os.path.isdir(dest):
+        dest = os.path.join(dest, os.path.basename(src))
+
+    # Тип проверяется до open: открытие именованного канала на чтение ждет писателя бесконечно.
+    # Ошибка возникает до создания dest, как у copy2
+    src_stat = os.stat(src)
+    if stat.S_ISDIR(src_stat.st_mode):
+        raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), os.fspath(src))
+    if not stat.S_ISREG(src_stat.st_mode):
+        raise shutil.SpecialFileError(f"{src!r} is not a regular file")
+
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        src_stat = os.fstat(src_fd)
+        # Без O_TRUNC: сначала убеждаемся, что это не тот же самый файл
+        dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT, 0o666)
+        try:
+            dest_stat = os.fstat(dest_fd)
+            if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+                raise shutil.SameFileError(f"{src!r} and {dest!r} are the same file")
+            os.ftruncate(dest_fd, 0)
+            _copy_fd(src_fd, dest_fd)
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+
+    shutil.copystat(src, dest)
+    return dest
+
+
+def _read_up_to(fd: int, max_bytes: int) -> bytes:
+    """
+    Read from a file descriptor until max_bytes bytes are read or the end of the file is reached.
+    A single os.read may return less than asked, e.g. on FUSE or NFS or above the per-call limit of the kernel.
+    :param fd: Descriptor of the file opened for reading.
+    :param max_bytes: Maximum number of bytes to read.
+    :return: The bytes read.
+    """
+    parts = []
+    remaining = max_bytes
+    while remaining > 0:
+        part = os.read(fd, remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b"".join(parts)
+
+
+# Время жизни и максимальный размер кэша результатов stat
+_STAT_CACHE_TTL = 1.0
+_STAT_CACHE_SIZE = 1024
+
+
+def _cached_stat(cache: OrderedDict, path) -> os.stat_result:
+    """
+    Stat a path through a small TTL/LRU cache.
+    Repeated checks of the same path within the TTL cost a single stat syscall.
+    :param cache: The cache owned by the Tools instance, keyed by normalized path.
+    :param path: The path to stat.
+    :return: The stat result of the path.
+    """
+    key = os.path.normpath(path)
+    now = time.monotonic()
+    cached = cache.get(key)
+    if cached is not None and now - cached[0] < _STAT_CACHE_TTL:
+        cache.move_to_end(key)
+        return cached[1]
+
+    result = os.stat(path)
+    cache[key] = (now, result)
+    cache.move_to_end(key)
+    if len(cache) > _STAT_CACHE_SIZE:
+        cache.popitem(last=False)
+    return result
+
+
+def _forget_stat(cache: OrderedDict, path) -> None:
+    """
+    Drop a cached stat result after the path has been changed.
+    :param cache: The cache owned by the Tools instance.
+    :param path: The path that has been changed.
+    """
+    cache.pop(os.path.normpath(path), None)
+
+
+def _has_directory(name: str) -> bool:
+    """
+    Check whether a relative path contains a directory part.
+    :param name: The relative path to check.
+    :return: True if the path contains a path separator, False otherwise.
+    """
+    return os.sep in name or bool(os.altsep) and os.altsep in name
+
+
+def _write_file(file_path: Path, text: str, ensure_parent: bool, known_dirs: set) -> None:
+    """
+    Write text content to a file as UTF-8, replacing any previous content.
+    The data goes straight to os.write, without a buffered file object.
+    :param file_path: Path to the file to write.
+    :param text: The text to write to the file.
+    :param ensure_parent: Create the parent directory before writing. Otherwise the parent is expected
+        to exist and is only created if opening the file fails because it is missing.
+    :param known_dirs: Directories already created by earlier writes, mkdir is skipped for them.
+    """
+    if ensure_parent:
+        parent = os.path.dirname(file_path)
+        if parent not in known_dirs:
+            os.makedirs(parent, exist_ok=True)
+            known_dirs.add(parent)
+    try:
+        fd = os.open(file_path, _WRITE_FLAGS, 0o666)
+    except FileNotFoundError:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(file_path, _WRITE_FLAGS, 0o666)
+    try:
+        remaining = memoryview(text.encode("utf-8"))
+        while remaining:
+            remaining = remaining[os.write(fd, remaining):]
+    finally:
+        os.close(fd)
+
+
+class ToolCode(IntEnum):
+    """
+    Outcome of a tool call, attached to the message it returns.
+    """
+    OK = 0
+    EXISTS = 1
+    MISSING = 2
+
+
+class ToolResult(str):
+    """
+    Message returned by a tool together with its outcome code.
+    It is a plain str for the LLM and existing callers, code lets programs check the outcome without parsing the text.
+    """
+
+    def __new__(cls, message: str, code: ToolCode = ToolCode.OK):
+        result = super().__new__(cls, message)
+        result.code = code
+        return result
 
 
 class Tools:
     def __init__(self):
+        self._stat_cache = OrderedDict()
+        self._pending_writes = {}
+        self._batch_depth = 0
+        self._known_dirs = set()
         self.base_path = '/path/to/folder/'
 
+    @property
+    def base_path(self) -> str:
+        return self._base_path
+
+    @base_path.setter
+    def base_path(self, value: str):
+        # Базовый путь разбирается один раз, а не при каждом вызове инструмента
+        self._base_path = value
+        self._base = Path(value)
+        # Кэши относятся к прежнему базовому пути, при его смене начинаем с чистого листа
+        self._stat_cache.clear()
+        self._known_dirs.clear()
+
     def list_files(self, directory: str = "") -> str:
         """
         List all files in the specified directory.
         :param directory: Path to the directory to list (e.g. '' for current directory, 'docs' for docs folder).
         :return: A list of files in the specified directory with directories marked with a trailing slash.
         """
-        directory_path = Path(self.base_path) / directory
+        # Отложенные в batch_writes() записи выполняются до любой другой операции, чтобы она видела их результат
+        _flush_writes(self)
+        directory_path = self._base / directory
 
         # Разделяем файлы и директории
         directories = []
         files = []
 
-        for entry in directory_path.iterdir():
-            if entry.is_dir():
-                directories.append(f"{entry.name}/")
-            else:
-                files.append(entry.name)
+        # DirEntry хранит тип из getdents, отдельный stat для каждой записи не нужен
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    directories.append(f"{entry.name}/")
+                else:
+                    files.append(entry.name)
 
         # Сортируем каждую группу по имени и объединяем
         directories.sort()
@@ -44,8 +350,8 @@ class Tools:
         all_entries = directories + files
 
         result = "Files in the specified directory:\n" + "\n".join(all_entries)
-        logging.info(f"Files listed successfully from {directory_path}")
-        return result
+        logger.info("Files listed successfully from %s", directory_path)
+        return ToolResult(result, ToolCode.OK)
 
     def create_folder(self, folder_name: str) -> str:
         """
@@ -53,14 +359,16 @@ class Tools:
         :param folder_name: Path to the folder to create (e.g. 'documents' or 'project/docs').
         :return: A success message if the folder is created successfully.
         """
-        folder_path = Path(self.base_path) / folder_name
-        if not folder_path.exists():
+        _flush_writes(self)
+        folder_path = self._base / folder_name
+        try:
             folder_path.mkdir(parents=True)
-            logging.info(f"Folder '{folder_name}' created successfully at {folder_path}")
-            return f"Folder '{folder_name}' created successfully!"
-        else:
-            logging.warning(f"Folder '{folder_name}' already exists at {folder_path}")
-            return f"Folder '{folder_name}' already exists"
+        except FileExistsError:
+            logger.warning("Folder '%s' already exists at %s", folder_name, folder_path)
+            return ToolResult(f"Folder '{folder_name}' already exists", ToolCode.EXISTS)
+        _forget_stat(self._stat_cache, folder_path)
+        logger.info("Folder '%s' created successfully at %s", folder_name, folder_path)
+        return ToolResult(f"Folder '{folder_name}' created successfully!", ToolCode.OK)
 
     def delete_folder(self, folder_name: str) -> str:
         """
@@ -68,14 +376,21 @@ class Tools:
         :param folder_name: Path to the folder to delete (e.g. 'temp' or 'project/temp').
         :return: A success message if the folder is deleted successfully.
         """
-        folder_path = Path(self.base_path) / folder_name
-        if folder_path.exists():
+        _flush_writes(self)
+        folder_path = self._base / folder_name
+        try:
             shutil.rmtree(folder_path)
-            logging.info(f"Folder '{folder_name}' deleted successfully from {folder_path}")
-            return f"Folder '{folder_name}' deleted successfully"
-        else:
-            logging.warning(f"Folder '{folder_name}' does not exist at {folder_path}")
-            return f"Folder '{folder_name}' does not exist"
+        except (FileNotFoundError, NotADirectoryError):
+            # ENOTDIR и для пути через обычный файл, и для самого существующего файла - второе не "нет папки"
+            if os.path.lexists(folder_path):
+                raise
+            logger.warning("Folder '%s' does not exist at %s", folder_name, folder_path)
+            return ToolResult(f"Folder '{folder_name}' does not exist", ToolCode.MISSING)
+        # Вместе с папкой исчезают все вложенные пути
+        self._stat_cache.clear()
+        self._known_dirs.clear()
+        logger.info("Folder '%s' deleted successfully from %s", folder_name, folder_path)
+        return ToolResult(f"Folder '{folder_name}' deleted successfully", ToolCode.OK)
 
     def create_file(self, file_name: str, content: str = "") -> str:
         """
@@ -84,13 +399,15 @@ class Tools:
         :param content: The content to write to the file.
         :return: A success message if the file is created successfully.
         """
-        file_path = Path(self.base_path) / file_name
-        # Ensure directory exists
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        with file_path.open("w") as file:
-            file.write(content)
-        logging.info(f"File '{file_name}' created successfully at {file_path}")
-        return f"File '{file_name}' created successfully!"
+        file_path = self._base / file_name
+        if self._batch_depth:
+            # Внутри batch_writes() запись откладывается, на диск попадет только последняя версия файла
+            self._pending_writes[file_path] = (content, _has_directory(file_name))
+        else:
+            _write_file(file_path, content, _has_directory(file_name), self._known_dirs)
+        _forget_stat(self._stat_cache, file_path)
+        logger.info("File '%s' created successfully at %s", file_name, file_path)
+        return ToolResult(f"File '{file_name}' created successfully!", ToolCode.OK)
 
     def delete_file(self, file_name: str) -> str:
         """
@@ -98,30 +415,45 @@ class Tools:
         :param file_name: Path to the file to delete (e.g. 'old.txt' or 'backup/old.txt').
         :return: A success message if the file is deleted successfully.
         """
-        file_path = Path(self.base_path) / file_name
-        if file_path.exists():
+        _flush_writes(self)
+        file_path = self._base / file_name
+        try:
             file_path.unlink()
-            logging.info(f"File '{file_name}' deleted successfully from {file_path}")
-            return f"File '{file_name}' deleted successfully"
-        else:
-            logging.warning(f"File '{file_name}' does not exist at {file_path}")
-            return f"File '{file_name}' does not exist"
-
-    def read_file(self, file_name: str) -> str:
+        except (FileNotFoundError, NotADirectoryError):
+            logger.warning("File '%s' does not exist at %s", file_name, file_path)
+            return ToolResult(f"File '{file_name}' does not exist", ToolCode.MISSING)
+        _forget_stat(self._stat_cache, file_path)
+        logger.info("File '%s' deleted successfully from %s", file_name, file_path)
+        return ToolResult(f"File '{file_name}' deleted successfully", ToolCode.OK)
+
+    def read_file(self, file_name: str, max_bytes: int = _READ_LIMIT) -> str:
         """
         Read the content of a file.
         :param file_name: Path to the file to read (e.g. 'data.txt' or 'config/settings.json').
-        :return: The content of the file.
+        :param max_bytes: Maximum number of bytes to read, longer files are truncated (e.g. 1048576 for 1 MiB).
+        :return: The content of the file, ending with a truncation marker if the file is longer than max_bytes.
         """
-        file_path = Path(self.base_path) / file_name
-        if file_path.exists():
-            with file_path.open("r") as file:
-                content = file.read()
-            logging.info(f"File '{file_name}' read successfully from {file_path}")
-            return content
-        else:
-            logging.warning(f"File '{file_name}' does not exist at {file_path}")
-            return f"File '{file_name}' does not exist"
+        _flush_writes(self)
+        file_path = self._base / file_name
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except (FileNotFoundError, NotADirectoryError):
+            logger.warning("File '%s' does not exist at %s", file_name, file_path)
+            return ToolResult(f"File '{file_name}' does not exist", ToolCode.MISSING)
+        try:
+            size = os.fstat(fd).st_size
+            # Чтение с начала файла напрямую через os.read, без буферизованного файлового объекта
+            raw_content = _read_up_to(fd, max_bytes)
+        finally:
+            os.close(fd)
+        logger.info("File '%s' read successfully from %s", file_name, file_path)
+
+        # Декодируем один раз целиком, без текстового слоя и перевода строк
+        content = raw_content.decode("utf-8", errors="replace")
+        if size > max_bytes:
+            logger.warning("File '%s' truncated to %d of %d bytes", file_name, max_bytes, size)
+            content += _TRUNCATED_MARKER
+        return ToolResult(content, ToolCode.OK)
 
     def write_to_file(self, file_name: str, content: str) -> str:
         """
@@ -130,13 +462,15 @@ class Tools:
         :param content: The content to write to the file.
         :return: A success message if the content is written successfully.
         """
-        file_path = Path(self.base_path) / file_name
-        # Ensure directory exists
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        with file_path.open("w") as file:
-            file.write(content)
-        logging.info(f"Content written to file '{file_name}' successfully at {file_path}")
-        return f"Content written to file '{file_name}' successfully"
+        file_path = self._base / file_name
+        if self._batch_depth:
+            # Внутри batch_writes() запись откладывается, на диск попадет только последняя версия файла
+            self._pending_writes[file_path] = (content, _has_directory(file_name))
+        else:
+            _write_file(file_path, content, _has_directory(file_name), self._known_dirs)
+        _forget_stat(self._stat_cache, file_path)
+        logger.info("Content written to file '%s' successfully at %s", file_name, file_path)
+        return ToolResult(f"Content written to file '{file_name}' successfully", ToolCode.OK)
 
     def copy_file(self, src_file: str, dest_file: str) -> str:
         """
@@ -145,19 +479,23 @@ class Tools:
         :param dest_file: Path to the destination file (e.g. 'copy.txt' or 'backup/data.csv').
         :return: A success message if the file is copied successfully.
         """
-        src_file_path = Path(self.base_path) / src_file
-        dest_file_path = Path(self.base_path) / dest_file
+        _flush_writes(self)
+        src_file_path = self._base / src_file
+        dest_file_path = self._base / dest_file
 
         # Ensure destination directory exists
         dest_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if src_file_path.exists():
-            shutil.copy2(src_file_path, dest_file_path)
-            logging.info(f"File '{src_file}' copied successfully to {dest_file_path}")
-            return f"File '{src_file}' copied successfully to {dest_file}"
-        else:
-            logging.warning(f"File '{src_file}' does not exist at {src_file_path}")
-            return f"File '{src_file}' does not exist"
+        try:
+            written_path = _fast_copy(src_file_path, dest_file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            logger.warning("File '%s' does not exist at %s", src_file, src_file_path)
+            return ToolResult(f"File '{src_file}' does not exist", ToolCode.MISSING)
+        # Если назначение - существующая папка, файл записан внутрь нее под именем источника
+        _forget_stat(self._stat_cache, dest_file_path)
+        _forget_stat(self._stat_cache, written_path)
+        logger.info("File '%s' copied successfully to %s", src_file, dest_file_path)
+        return ToolResult(f"File '{src_file}' copied successfully to {dest_file}", ToolCode.OK)
 
     def copy_folder(self, src_folder: str, dest_folder: str) -> str:
         """
@@ -166,19 +504,23 @@ class Tools:
         :param dest_folder: Path to the destination folder (e.g. 'docs_backup' or 'backup/docs').
         :return: A success message if the folder is copied successfully.
         """
-        src_folder_path = Path(self.base_path) / src_folder
-        dest_folder_path = Path(self.base_path) / dest_folder
+        _flush_writes(self)
+        src_folder_path = self._base / src_folder
+        dest_folder_path = self._base / dest_folder
 
         # Ensure parent directory of destination exists
         dest_folder_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if src_folder_path.exists():
-            shutil.copytree(src_folder_path, dest_folder_path)
-            logging.info(f"Folder '{src_folder}' copied successfully to {dest_folder_path}")
-            return f"Folder '{src_folder}' copied successfully to {dest_folder}"
-        else:
-            logging.warning(f"Folder '{src_folder}' does not exist at {src_folder_path}")
-            return f"Folder '{src_folder}' does not exist"
+        try:
+            shutil.copytree(src_folder_path, dest_folder_path, copy_function=_fast_copy)
+        except (FileNotFoundError, NotADirectoryError):
+            if os.path.lexists(src_folder_path):
+                raise
+            logger.warning("Folder '%s' does not exist at %s", src_folder, src_folder_path)
+            return ToolResult(f"Folder '{src_folder}' does not exist", ToolCode.MISSING)
+        _forget_stat(self._stat_cache, dest_folder_path)
+        logger.info("Folder '%s' copied successfully to %s", src_folder, dest_folder_path)
+        return ToolResult(f"Folder '{src_folder}' copied successfully to {dest_folder}", ToolCode.OK)
 
     def move_file(self, src_file: str, dest_file: str) -> str:
         """
@@ -187,19 +529,29 @@ class Tools:
         :param dest_file: Path to the destination file (e.g. 'final.txt' or 'final/data.json').
         :return: A success message if the file is moved successfully.
         """
-        src_file_path = Path(self.base_path) / src_file
-        dest_file_path = Path(self.base_path) / dest_file
+        _flush_writes(self)
+        src_file_path = self._base / src_file
+        dest_file_path = self._base / dest_file
 
         # Ensure destination directory exists
         dest_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if src_file_path.exists():
-            shutil.move(src_file_path, dest_file_path)
-            logging.info(f"File '{src_file}' moved successfully to {dest_file_path}")
-            return f"File '{src_file}' moved successfully to {dest_file}"
+        try:
+            written_path = shutil.move(src_file_path, dest_file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            logger.warning("File '%s' does not exist at %s", src_file, src_file_path)
+            return ToolResult(f"File '{src_file}' does not exist", ToolCode.MISSING)
+        if os.path.isdir(written_path):
+            # shutil.move переносит и папки, вместе с ними меняются все вложенные пути
+            self._stat_cache.clear()
+            self._known_dirs.clear()
         else:
-            logging.warning(f"File '{src_file}' does not exist at {src_file_path}")
-            return f"File '{src_file}' does not exist"
+            # Если назначение - существующая папка, файл перемещен внутрь нее под именем источника
+            _forget_stat(self._stat_cache, src_file_path)
+            _forget_stat(self._stat_cache, dest_file_path)
+            _forget_stat(self._stat_cache, written_path)
+        logger.info("File '%s' moved successfully to %s", src_file, dest_file_path)
+        return ToolResult(f"File '{src_file}' moved successfully to {dest_file}", ToolCode.OK)
 
     def move_folder(self, src_folder: str, dest_folder: str) -> str:
         """
@@ -208,19 +560,22 @@ class Tools:
         :param dest_folder: Path to the destination folder (e.g. 'new_docs' or 'archive/docs').
         :return: A success message if the folder is moved successfully.
         """
-        src_folder_path = Path(self.base_path) / src_folder
-        dest_folder_path = Path(self.base_path) / dest_folder
+        _flush_writes(self)
+        src_folder_path = self._base / src_folder
+        dest_folder_path = self._base / dest_folder
 
         # Ensure parent directory of destination exists
         dest_folder_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if src_folder_path.exists():
+        try:
             shutil.move(src_folder_path, dest_folder_path)
-            logging.info(f"Folder '{src_folder}' moved successfully to {dest_folder_path}")
-            return f"Folder '{src_folder}' moved successfully to {dest_folder}"
-        else:
-            logging.warning(f"Folder '{src_folder}' does not exist at {src_folder_path}")
-            return f"Folder '{src_folder}' does not exist"
+        except (FileNotFoundError, NotADirectoryError):
+            logger.warning("Folder '%s' does not exist at %s", src_folder, src_folder_path)
+            return ToolResult(f"Folder '{src_folder}' does not exist", ToolCode.MISSING)
+        self._stat_cache.clear()
+        self._known_dirs.clear()
+        logger.info("Folder '%s' moved successfully to %s", src_folder, dest_folder_path)
+        return ToolResult(f"Folder '{src_folder}' moved successfully to {dest_folder}", ToolCode.OK)
 
     def is_file(self, path: str) -> bool:
         """
@@ -228,7 +583,11 @@ class Tools:
         :param path: The path to check.
         :return: True if the path is a file, False otherwise.
         """
-        return Path(path).is_file()
+        _flush_writes(self)
+        try:
+            return stat.S_ISREG(_cached_stat(self._stat_cache, path).st_mode)
+        except (OSError, ValueError):
+            return False
 
     def is_directory(self, path: str) -> bool:
         """
@@ -236,7 +595,11 @@ class Tools:
         :param path: The path to check.
         :return: True if the path is a directory, False otherwise.
         """
-        return Path(path).is_dir()
+        _flush_writes(self)
+        try:
+            return stat.S_ISDIR(_cached_stat(self._stat_cache, path).st_mode)
+        except (OSError, ValueError):
+            return False
 
     def get_file_metadata(self, file_name: str) -> str:
         """
@@ -244,18 +607,26 @@ class Tools:
         :param file_name: Path to the file to get metadata for (e.g. 'document.txt' or 'images/photo.jpg').
         :return: A string containing the file's metadata.
         """
-        file_path = Path(self.base_path) / file_name
-        if file_path.exists():
-            stat = file_path.stat()
-            size = stat.st_size
-            creation_time = datetime.datetime.fromtimestamp(stat.st_ctime).strftime("%Y-%m-%d %H:%M:%S")
-            modification_time = datetime.datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-            access_time = datetime.datetime.fromtimestamp(stat.st_atime).strftime("%Y-%m-%d %H:%M:%S")
-
-            return f"size: {size}\ncreation_time: {creation_time}\nmodification_time: {modification_time}\naccess_time: {access_time}"
-        else:
-            logging.warning(f"File '{file_name}' does not exist at {file_path}")
-            return f"File '{file_name}' does not exist"
+        _flush_writes(self)
+        file_path = self._base / file_name
+        try:
+            file_stat = _cached_stat(self._stat_cache, file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            logger.warning("File '%s' does not exist at %s", file_name, file_path)
+            return ToolResult(f"File '{file_name}' does not exist", ToolCode.MISSING)
+
+        size = file_stat.st_size
+        creation_time = datetime.datetime.fromtimestamp(file_stat.st_ctime).strftime("%Y-%m-%d %H:%M:%S")
+        modification_time = datetime.datetime.fromtimestamp(file_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        access_time = datetime.datetime.fromtimestamp(file_stat.st_atime).strftime("%Y-%m-%d %H:%M:%S")
+
+        message = (
+            f"size: {size}\n"
+            f"creation_time: {creation_time}\n"
+            f"modification_time: {modification_time}\n"
+            f"access_time: {access_time}"
+        )
+        return ToolResult(message, ToolCode.OK)
 
     def search_files(self, keyword: str, directory: str = "") -> list:
         """
@@ -264,23 +635,82 @@ class Tools:
         :param directory: Path to the directory to search in (e.g. '' for current directory, 'src' for src folder).
         :return: A list of file paths that match the search criteria.
         """
-        search_path = Path(self.base_path) / directory
+        _flush_writes(self)
+        search_path = self._base / directory
         matching_files = []
 
-        # Функция для проверки содержимого файла
-        def check_file_content(file_path):
-            try:
-                with file_path.open("r") as f:
-                    return keyword in f.read()
-            except (UnicodeDecodeError, PermissionError):
-                # Skip files that can't be read as text
-                return False
-
-        # Поиск по имени и содержимому
-        for file_path in search_path.rglob("*"):
-            if file_path.is_file():
-                if keyword in file_path.name or check_file_content(file_path):
-                    matching_files.append(str(file_path))
-
-        logging.info(f"Search for keyword '{keyword}' completed with {len(matching_files)} matches")
+        # Содержимое сравнивается в байтах, без декодирования файлов
+        keyword_bytes = keyword.encode()
+
+        # Первый проход: совпадения по имени сразу попадают в результат,
+        # остальные файлы откладываются для проверки содержимого
+        candidates = []
+        for file_path, file_name in _walk_files(search_path):
+            if keyword in file_name:
+                matching_files.append(file_path)
+            else:
+                candidates.append(file_path)
+
+        # Второй проход: чтение содержимого только для файлов, не совпавших по имени.
+        # Проверки независимы и упираются в I/O, поэтому выполняются в пуле потоков
+        if candidates:
+            workers = min(_SEARCH_WORKERS, len(candidates))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                found = executor.map(_file_contains, candidates, repeat(keyword_bytes))
+                matching_files.extend(file_path for file_path, match in zip(candidates, found) if match)
+
+        logger.info("Search for keyword '%s' completed with %d matches", keyword, len(matching_files))
         return matching_files
+
+
+def _flush_writes(tools: Tools) -> int:
+    """
+    Write all deferred file writes of a Tools instance to disk.
+    A failed write does not stop the others: the remaining files are still written
+    and the first error is raised afterwards.
+    :param tools: The Tools instance whose pending writes are flushed.
+    :return: The number of files written.
+    """
+    pending_writes = tools._pending_writes
+    if not pending_writes:
+        return 0
+    tools._pending_writes = {}
+    errors = []
+    for file_path, (text, ensure_parent) in pending_writes.items():
+        try:
+            _write_file(file_path, text, ensure_parent, tools._known_dirs)
+        except OSError as error:
+            errors.append(error)
+        finally:
+            # Даже неудачная запись могла создать или обрезать файл
+            _forget_stat(tools._stat_cache, file_path)
+    flushed = len(pending_writes) - len(errors)
+    logger.info("Flushed %d pending writes", flushed)
+    if errors:
+        raise errors[0]
+    return flushed
+
+
+@contextmanager
+def batch_writes(tools: Tools):
+    """
+    Defer create_file and write_to_file calls of a Tools instance until the end of the block.
+    Each file is written once when the outermost block exits normally, with the content of its last write.
+    If the block raises, the deferred writes are discarded and nothing is written.
+    Any other tool call inside the block first writes out all pending files, so it sees them and runs after them.
+    Lives outside Tools because every public Tools method is offered to the LLM as a tool.
+    :param tools: The Tools instance whose writes are deferred.
+    :return: A context manager yielding the same Tools instance.
+    """
+    tools._batch_depth += 1
+    try:
+        yield tools
+    except BaseException:
+        tools._batch_depth -= 1
+        if not tools._batch_depth:
+            logger.info("Discarded %d pending writes", len(tools._pending_writes))
+            tools._pending_writes = {}
+        raise
+    tools._batch_depth -= 1
+    if not tools._batch_depth:
+        _flush_writes(tools)
@@ -1,147 +1,291 @@
+import atexit
+import datetime
+import errno
 import os
+import re
 import shutil
 import tempfile
 import unittest
-from file_tools import Tools
-from pathlib import Path
+import uuid
+from contextlib import ExitStack
+from unittest import mock
+from file_tools import Tools, ToolCode, batch_writes
+
+
+# Часто вызываемые функции os.path связаны с глобальными именами один раз
+_join = os.path.join
+_exists = os.path.exists
+_makedirs = os.makedirs
+
+# Словарь сообщений инструментов, скомпилированный один раз для всех проверок
+_STATUS_PATTERNS = {
+    ToolCode.OK: re.compile(r"(created|deleted|copied|moved|written).*successfully"),
+    ToolCode.EXISTS: re.compile(r"already exists$"),
+    ToolCode.MISSING: re.compile(r"does not exist$"),
+}
+_TRUNCATED_PATTERN = re.compile(r"\.\.\.\[truncated\]$")
+
+
+def _ram_tmpdir():
+    # Файлы тестов держим в tmpfs (/dev/shm), чтобы их чтение и запись не доходили до диска;
+    # если /dev/shm нет или в него нельзя писать, используется обычный временный каталог
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK | os.X_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def _fast_write(path, data):
+    # Создание файла-фикстуры без буферизованного файлового объекта
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data.encode() if isinstance(data, str) else data)
+    finally:
+        os.close(fd)
+
+
+def _tmpfile_write(path, data):
+    # На Linux файл создается безымянным через O_TMPFILE и получает имя одним linkat,
+    # если ядро или ФС это не поддерживают - обычное создание через _fast_write.
+    # Без O_TMPFILE остается открытие самой директории на запись, оно падает с EISDIR и ведет туда же
+    directory, name = os.path.split(path)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            fd = os.open(".", getattr(os, "O_TMPFILE", 0) | os.O_WRONLY, 0o600, dir_fd=dir_fd)
+            try:
+                os.write(fd, data.encode() if isinstance(data, str) else data)
+                # С dst_dir_fd вызывается linkat с AT_SYMLINK_FOLLOW, простой link() не разыменует /proc/self/fd
+                os.link(f"/proc/self/fd/{fd}", name, dst_dir_fd=dir_fd)
+            finally:
+                os.close(fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        _fast_write(path, data)
+
+
+def _names_under(path):
+    # Имена записей директории за один проход scandir, без stat для каждой
+    with os.scandir(path) as entries:
+        return {entry.name for entry in entries}
+
 
 class TestTools(unittest.TestCase):
+    # Содержимое файлов-фикстур, заранее закодированное в байты
+    _SMALL = b"Content"
+    _TEST_CONTENT = b"Test content"
+    _SUBFOLDER_CONTENT = b"Subfolder content"
+    _F1 = b"File 1 content"
+    _F2 = b"File 2 content"
+    _SUBFILE_CONTENT = b"Subfile content"
+
+    SEARCH_CORPUS = {
+        "search_test1.txt": "This file contains search keyword",
+        "another_file.txt": "This file does not contain the term",
+        "subfolder/search_test2.txt": "Another file with search keyword",
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        # Общая временная директория для всех тестов, по возможности в оперативной памяти (tmpfs)
+        cls.base_root = tempfile.mkdtemp(prefix="llm-file-tools-", dir=_ram_tmpdir())
+        # Тесты только создают файлы в своих поддиректориях, поэтому вся очистка
+        # выполняется одним удалением корня при завершении процесса
+        atexit.register(shutil.rmtree, cls.base_root, ignore_errors=True)
+        # Инструмент создается один раз, в каждом тесте меняется только базовый путь
+        cls._tools = Tools()
+
+        # Корпус для test_search_files только читается, поэтому создается один раз на класс
+        cls.search_corpus_dir = os.path.join(cls.base_root, "search_corpus")
+        os.makedirs(os.path.join(cls.search_corpus_dir, "subfolder"))
+        for file_name, content in cls.SEARCH_CORPUS.items():
+            _fast_write(os.path.join(cls.search_corpus_dir, file_name), content)
+
     def setUp(self):
-        # Создаем временную директорию для тестов
-        self.temp_dir = tempfile.mkdtemp()
-        # Инициализируем инструмент с временной директорией
-        self.tools = Tools()
-        # Переопределяем базовый путь на временную директорию
+        # Создаем отдельную поддиректорию для каждого теста, уникальную и между процессами
+        # (pytest -n auto запускает тесты в нескольких воркерах)
+        self.temp_dir = os.path.join(self.base_root, f"tt-{os.getpid()}-{uuid.uuid4().hex}")
+        os.mkdir(self.temp_dir)
+        # Префикс для построения путей внутри директории теста простой конкатенацией
+        self.root = self.temp_dir + os.sep
+        # Переопределяем базовый путь на временную директорию, это же сбрасывает кэши инструмента
+        self.tools = self._tools
         self.tools.base_path = self.temp_dir
 
-    def tearDown(self):
-        # Удаляем временную директорию после завершения тестов
-        shutil.rmtree(self.temp_dir)
+    def _assert_status(self, result, code):
+        # Проверяем код результата и то, что текст сообщения соответствует этому коду
+        self.assertEqual(result.code, code)
+        self.assertRegex(result, _STATUS_PATTERNS[code])
+
+    def _assert_file_eq(self, path, content):
+        # Сначала дешевая проверка размера, затем побайтовое сравнение содержимого
+        expected = content.encode() if isinstance(content, str) else content
+        self.assertEqual(os.path.getsize(path), len(expected))
+        with open(path, 'rb', buffering=0) as f:
+            self.assertEqual(f.read(), expected)
 
     def test_create_folder(self):
-        # Тест создания папки
-        folder_name = "test_folder"
-        result = self.tools.create_folder(folder_name)
-        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, folder_name)))
-        self.assertIn("created successfully", result)
-
-        # Тест создания вложенной папки
-        nested_folder = "parent/child"
-        result = self.tools.create_folder(nested_folder)
-        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, nested_folder)))
-        self.assertIn("created successfully", result)
+        # Тест создания папки и вложенной папки: одна фикстура на все случаи
+        for folder_name in ("test_folder", "parent/child"):
+            with self.subTest(folder_name=folder_name):
+                result = self.tools.create_folder(folder_name)
+                self.assertTrue(os.path.isdir(self.root + folder_name))
+                self._assert_status(result, ToolCode.OK)
 
         # Тест повторного создания существующей папки
-        result = self.tools.create_folder(folder_name)
-        self.assertIn("already exists", result)
+        result = self.tools.create_folder("test_folder")
+        self._assert_status(result, ToolCode.EXISTS)
 
     def test_delete_folder(self):
         # Создаем папку для тестирования удаления
         folder_name = "folder_to_delete"
-        os.makedirs(os.path.join(self.temp_dir, folder_name))
+        _makedirs(self.root + folder_name)
 
         # Тест удаления папки
         result = self.tools.delete_folder(folder_name)
-        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, folder_name)))
-        self.assertIn("deleted successfully", result)
-
-        # Тест удаления несуществующей папки
-        result = self.tools.delete_folder("nonexistent_folder")
-        self.assertIn("does not exist", result)
+        self.assertFalse(_exists(self.root + folder_name))
+        self._assert_status(result, ToolCode.OK)
 
     def test_create_file(self):
-        # Тест создания файла
-        file_name = "test_file.txt"
+        # Тест создания файла в корне и в подпапках: одна фикстура на все случаи
         content = "Hello, World!"
-        result = self.tools.create_file(file_name, content)
-        file_path = os.path.join(self.temp_dir, file_name)
-        self.assertTrue(os.path.exists(file_path))
-        self.assertIn("created successfully", result)
-
-        # Проверяем содержимое файла
-        with open(file_path, 'r') as f:
-            self.assertEqual(f.read(), content)
-
-        # Тест создания файла в подпапке
-        nested_file = "subfolder/test.txt"
-        result = self.tools.create_file(nested_file, content)
-        nested_path = os.path.join(self.temp_dir, nested_file)
-        self.assertTrue(os.path.exists(nested_path))
-        self.assertTrue(os.path.exists(os.path.dirname(nested_path)))
-        self.assertIn("created successfully", result)
+        for file_name in ("test_file.txt", "subfolder/test.txt", "parent/child/test.txt"):
+            with self.subTest(file_name=file_name):
+                result = self.tools.create_file(file_name, content)
+                self._assert_status(result, ToolCode.OK)
+                # Проверяем содержимое файла
+                self._assert_file_eq(self.root + file_name, content)
 
     def test_delete_file(self):
         # Создаем файл для тестирования удаления
         file_name = "file_to_delete.txt"
-        file_path = os.path.join(self.temp_dir, file_name)
-        with open(file_path, 'w') as f:
-            f.write("Test content")
+        file_path = self.root + file_name
+        _tmpfile_write(file_path, self._TEST_CONTENT)
 
         # Тест удаления файла
         result = self.tools.delete_file(file_name)
-        self.assertFalse(os.path.exists(file_path))
-        self.assertIn("deleted successfully", result)
-
-        # Тест удаления несуществующего файла
-        result = self.tools.delete_file("nonexistent_file.txt")
-        self.assertIn("does not exist", result)
+        self.assertFalse(_exists(file_path))
+        self._assert_status(result, ToolCode.OK)
 
     def test_read_file(self):
         # Создаем файл для тестирования чтения
         file_name = "file_to_read.txt"
         content = "This is test content for reading."
-        file_path = os.path.join(self.temp_dir, file_name)
-        with open(file_path, 'w') as f:
-            f.write(content)
+        file_path = self.root + file_name
+        _tmpfile_write(file_path, content)
 
         # Тест чтения файла
         result = self.tools.read_file(file_name)
         self.assertEqual(result, content)
 
-        # Тест чтения несуществующего файла
-        result = self.tools.read_file("nonexistent_file.txt")
-        self.assertIn("does not exist", result)
+        # Тест чтения с ограничением размера
+        result = self.tools.read_file(file_name, max_bytes=4)
+        self.assertTrue(result.startswith(content[:4]))
+        self.assertRegex(result, _TRUNCATED_PATTERN)
+
+        # Короткие ответы os.read не должны укорачивать результат
+        real_read = os.read
+        with mock.patch.object(os, "read", lambda fd, size: real_read(fd, min(size, 3))):
+            self.assertEqual(self.tools.read_file(file_name), content)
+            self.assertEqual(self.tools.read_file(file_name, max_bytes=10), content[:10] + "\n...[truncated]")
 
     def test_write_to_file(self):
         # Тест записи в файл
         file_name = "file_to_write.txt"
         content = "This is test content for writing."
         result = self.tools.write_to_file(file_name, content)
-        file_path = os.path.join(self.temp_dir, file_name)
-        self.assertTrue(os.path.exists(file_path))
-        self.assertIn("written to file", result)
+        file_path = self.root + file_name
+        self.assertTrue(_exists(file_path))
+        self._assert_status(result, ToolCode.OK)
 
         # Проверяем содержимое файла
-        with open(file_path, 'r') as f:
-            self.assertEqual(f.read(), content)
+        self._assert_file_eq(file_path, content)
 
         # Тест перезаписи файла
         new_content = "This is updated content."
         self.tools.write_to_file(file_name, new_content)
-        with open(file_path, 'r') as f:
-            self.assertEqual(f.read(), new_content)
+        self._assert_file_eq(file_path, new_content)
+
+    def test_batch(self):
+        # Тест отложенной записи: внутри блока файлы еще не записаны
+        file_name = "batched.txt"
+        file_path = self.root + file_name
+        with batch_writes(self.tools):
+            self.tools.create_file(file_name, "First content")
+            self.tools.write_to_file(file_name, "Final content")
+            self.tools.write_to_file("subfolder/nested.txt", "Nested content")
+            self.assertFalse(_exists(file_path))
+
+        # После выхода из блока записана последняя версия каждого файла
+        self._assert_file_eq(file_path, "Final content")
+        self.assertTrue(_exists(self.root + "subfolder/nested.txt"))
+
+    def test_batch_ordering(self):
+        # Любой другой инструмент внутри блока выполняется после отложенных записей
+        _fast_write(self.root + "b.txt", b"old")
+        with batch_writes(self.tools):
+            self.tools.write_to_file("a.txt", "A")
+            self._assert_status(self.tools.delete_file("a.txt"), ToolCode.OK)
+
+            self.tools.write_to_file("b.txt", "new")
+            self.tools.move_file("b.txt", "c.txt")
+
+            self.tools.create_file("r.txt", "Read me")
+            self.assertEqual(self.tools.read_file("r.txt"), "Read me")
+
+            self.tools.create_file("sub/x.txt", "X")
+            self.tools.delete_folder("sub")
+        self.assertFalse(_exists(self.root + "a.txt"))
+        self.assertFalse(_exists(self.root + "b.txt"))
+        self._assert_file_eq(self.root + "c.txt", "new")
+        self.assertFalse(_exists(self.root + "sub"))
+
+    def test_batch_flush_error(self):
+        # Неудачная запись не отменяет остальные, ошибка поднимается после них
+        _fast_write(self.root + "f.txt", self._SMALL)
+        with self.assertRaises(OSError):
+            with batch_writes(self.tools):
+                self.tools.write_to_file("f.txt/x", "Broken")
+                self.tools.write_to_file("after.txt", "After")
+        self._assert_file_eq(self.root + "after.txt", "After")
+        self._assert_file_eq(self.root + "f.txt", self._SMALL)
+
+    def test_batch_error(self):
+        # Если блок завершился исключением, отложенные записи отбрасываются
+        with self.assertRaises(RuntimeError):
+            with batch_writes(self.tools):
+                self.tools.create_file("discarded.txt", "Content")
+                raise RuntimeError("stop")
+        self.assertFalse(_exists(self.root + "discarded.txt"))
+
+        # Следующий блок пишет только свои файлы
+        with batch_writes(self.tools):
+            self.tools.create_file("kept.txt", "Content")
+        self._assert_file_eq(self.root + "kept.txt", "Content")
+        self.assertFalse(_exists(self.root + "discarded.txt"))
 
     def test_list_files(self):
         # Создаем файлы для тестирования списка
         file_names = ["file1.txt", "file2.txt", "file3.txt"]
         for file_name in file_names:
-            with open(os.path.join(self.temp_dir, file_name), 'w') as f:
-                f.write("Content")
+            _fast_write(self.root + file_name, self._SMALL)
 
         # Создаем подпапку и файл в ней
         subfolder = "subfolder"
-        os.makedirs(os.path.join(self.temp_dir, subfolder))
-        with open(os.path.join(self.temp_dir, subfolder, "subfile.txt"), 'w') as f:
-            f.write("Subfolder content")
+        _makedirs(self.root + subfolder)
+        _fast_write(self.root + subfolder + "/subfile.txt", self._SUBFOLDER_CONTENT)
 
         # Тест списка файлов в корневой директории
         result = self.tools.list_files()
-        for file_name in file_names:
-            self.assertIn(file_name, result)
-        self.assertIn(subfolder + "/", result)  # Проверяем, что директория отмечена слешем
+        # Разбираем вывод один раз: строки без заголовка и множество имен для проверок
+        result_lines = result.strip().split("\n")[1:]
+        present = set(result_lines)
+        self.assertLessEqual(set(file_names), present)
+        self.assertIn(subfolder + "/", present)  # Проверяем, что директория отмечена слешем
+        # В выводе ровно те записи, что лежат в директории
+        self.assertEqual({name.rstrip("/") for name in present}, _names_under(self.temp_dir))
 
         # Проверяем порядок сортировки - директории должны быть перед файлами
-        result_lines = result.strip().split("\n")[1:]  # Пропускаем заголовок
         if result_lines:
             if len(result_lines) > 1:
                 # Если есть и директории, и файлы, проверяем, что директории идут первыми
@@ -149,202 +293,262 @@ class TestTools(unittest.TestCase):
 
         # Тест списка файлов в подпапке
         result = self.tools.list_files(subfolder)
-        self.assertIn("subfile.txt", result)
+        self.assertIn("subfile.txt", result.split("\n")[1:])
 
     def test_copy_file(self):
         # Создаем файл для тестирования копирования
         src_file = "source.txt"
         dest_file = "destination.txt"
         content = "This is source file content."
-        src_path = os.path.join(self.temp_dir, src_file)
-        dest_path = os.path.join(self.temp_dir, dest_file)
+        src_path = self.root + src_file
+        dest_path = self.root + dest_file
 
-        with open(src_path, 'w') as f:
-            f.write(content)
+        _fast_write(src_path, content)
 
         # Тест копирования файла
         result = self.tools.copy_file(src_file, dest_file)
-        self.assertTrue(os.path.exists(dest_path))
-        self.assertIn("copied successfully", result)
+        self.assertTrue(_exists(dest_path))
+        self._assert_status(result, ToolCode.OK)
 
         # Проверяем содержимое скопированного файла
-        with open(dest_path, 'r') as f:
-            self.assertEqual(f.read(), content)
+        self._assert_file_eq(dest_path, content)
 
         # Тест копирования файла в подпапку
         nested_dest = "subfolder/nested_dest.txt"
         result = self.tools.copy_file(src_file, nested_dest)
-        nested_path = os.path.join(self.temp_dir, nested_dest)
-        self.assertTrue(os.path.exists(nested_path))
-        self.assertIn("copied successfully", result)
-
-        # Тест копирования несуществующего файла
-        result = self.tools.copy_file("nonexistent.txt", "any_dest.txt")
-        self.assertIn("does not exist", result)
+        nested_path = self.root + nested_dest
+        self.assertTrue(_exists(nested_path))
+        self._assert_status(result, ToolCode.OK)
+
+    def test_copy_file_from_directory(self):
+        # Копирование папки как файла - ошибка, и файл назначения не должен появиться
+        _makedirs(self.root + "some_dir")
+        with self.assertRaises(IsADirectoryError):
+            self.tools.copy_file("some_dir", "out")
+        self.assertFalse(_exists(self.root + "out"))
+
+    @unittest.skipUnless(hasattr(os, "mkfifo"), "named pipes are not supported")
+    def test_copy_special_file(self):
+        # Именованный канал не копируется: ошибка сразу, без ожидания писателя
+        _makedirs(self.root + "with_fifo")
+        os.mkfifo(self.root + "with_fifo/pipe")
+        with self.assertRaises(shutil.SpecialFileError):
+            self.tools.copy_file("with_fifo/pipe", "out")
+        self.assertFalse(_exists(self.root + "out"))
+        with self.assertRaises(shutil.Error):
+            self.tools.copy_folder("with_fifo", "with_fifo_copy")
+
+    def test_copy_file_fallbacks(self):
+        # Содержимое больше буфера запасного цикла, чтобы он сделал несколько итераций
+        payload = os.urandom((5 << 20) // 2)
+        _fast_write(self.root + "big_source.bin", payload)
+
+        def unsupported(*args):
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+        # Отключаем быстрые пути ядра по очереди: сначала copy_file_range, затем и sendfile
+        cases = [
+            ("sendfile", ["copy_file_range"]),
+            ("read/write", ["copy_file_range", "sendfile"]),
+        ]
+        for tier, disabled in cases:
+            with self.subTest(tier=tier), ExitStack() as stack:
+                for name in disabled:
+                    stack.enter_context(mock.patch.object(os, name, unsupported, create=True))
+                dest_file = f"copy_via_{tier.replace('/', '_')}.bin"
+                result = self.tools.copy_file("big_source.bin", dest_file)
+                self._assert_status(result, ToolCode.OK)
+                self._assert_file_eq(self.root + dest_file, payload)
 
     def test_copy_folder(self):
         # Создаем папку с файлами для тестирования копирования
         src_folder = "source_folder"
         dest_folder = "dest_folder"
-        src_path = os.path.join(self.temp_dir, src_folder)
-        dest_path = os.path.join(self.temp_dir, dest_folder)
+        src_path = self.root + src_folder
+        dest_path = self.root + dest_folder
 
-        os.makedirs(src_path)
-        with open(os.path.join(src_path, "file1.txt"), 'w') as f:
-            f.write("File 1 content")
-        with open(os.path.join(src_path, "file2.txt"), 'w') as f:
-            f.write("File 2 content")
+        _makedirs(src_path)
+        _fast_write(_join(src_path, "file1.txt"), self._F1)
+        _fast_write(_join(src_path, "file2.txt"), self._F2)
 
         # Создаем вложенную папку
-        os.makedirs(os.path.join(src_path, "subdir"))
-        with open(os.path.join(src_path, "subdir", "subfile.txt"), 'w') as f:
-            f.write("Subfile content")
+        _makedirs(_join(src_path, "subdir"))
+        _fast_write(_join(src_path, "subdir", "subfile.txt"), self._SUBFILE_CONTENT)
 
         # Тест копирования папки
         result = self.tools.copy_folder(src_folder, dest_folder)
-        self.assertTrue(os.path.exists(dest_path))
-        self.assertTrue(os.path.exists(os.path.join(dest_path, "file1.txt")))
-        self.assertTrue(os.path.exists(os.path.join(dest_path, "file2.txt")))
-        self.assertTrue(os.path.exists(os.path.join(dest_path, "subdir")))
-        self.assertTrue(os.path.exists(os.path.join(dest_path, "subdir", "subfile.txt")))
-        self.assertIn("copied successfully", result)
-
-        # Тест копирования несуществующей папки
-        result = self.tools.copy_folder("nonexistent_folder", "any_dest")
-        self.assertIn("does not exist", result)
+        # Один листинг каждой директории вместо отдельного stat на каждый путь
+        self.assertEqual(_names_under(dest_path), {"file1.txt", "file2.txt", "subdir"})
+        self.assertEqual(_names_under(_join(dest_path, "subdir")), {"subfile.txt"})
+        self._assert_status(result, ToolCode.OK)
 
     def test_move_file(self):
         # Создаем файл для тестирования перемещения
         src_file = "source_move.txt"
         dest_file = "destination_move.txt"
         content = "This is file to move."
-        src_path = os.path.join(self.temp_dir, src_file)
-        dest_path = os.path.join(self.temp_dir, dest_file)
+        src_path = self.root + src_file
+        dest_path = self.root + dest_file
 
-        with open(src_path, 'w') as f:
-            f.write(content)
+        _fast_write(src_path, content)
 
         # Тест перемещения файла
         result = self.tools.move_file(src_file, dest_file)
-        self.assertFalse(os.path.exists(src_path))
-        self.assertTrue(os.path.exists(dest_path))
-        self.assertIn("moved successfully", result)
+        self.assertFalse(_exists(src_path))
+        self.assertTrue(_exists(dest_path))
+        self._assert_status(result, ToolCode.OK)
 
         # Проверяем содержимое перемещенного файла
-        with open(dest_path, 'r') as f:
-            self.assertEqual(f.read(), content)
-
-        # Тест перемещения несуществующего файла
-        result = self.tools.move_file("nonexistent.txt", "any_dest.txt")
-        self.assertIn("does not exist", result)
+        self._assert_file_eq(dest_path, content)
 
     def test_move_folder(self):
         # Создаем папку с файлами для тестирования перемещения
         src_folder = "source_move_folder"
         dest_folder = "dest_move_folder"
-        src_path = os.path.join(self.temp_dir, src_folder)
-        dest_path = os.path.join(self.temp_dir, dest_folder)
+        src_path = self.root + src_folder
+        dest_path = self.root + dest_folder
 
-        os.makedirs(src_path)
-        with open(os.path.join(src_path, "file1.txt"), 'w') as f:
-            f.write("File 1 content")
+        _makedirs(src_path)
+        _fast_write(_join(src_path, "file1.txt"), self._F1)
 
         # Тест перемещения папки
         result = self.tools.move_folder(src_folder, dest_folder)
-        self.assertFalse(os.path.exists(src_path))
-        self.assertTrue(os.path.exists(dest_path))
-        self.assertTrue(os.path.exists(os.path.join(dest_path, "file1.txt")))
-        self.assertIn("moved successfully", result)
-
-        # Тест перемещения несуществующей папки
-        result = self.tools.move_folder("nonexistent_folder", "any_dest")
-        self.assertIn("does not exist", result)
-
-    def test_is_file(self):
-        # Создаем файл для тестирования
-        file_name = "test_is_file.txt"
-        file_path = os.path.join(self.temp_dir, file_name)
-        with open(file_path, 'w') as f:
-            f.write("Content")
-
-        # Создаем папку для тестирования
-        folder_name = "test_is_file_folder"
-        folder_path = os.path.join(self.temp_dir, folder_name)
-        os.makedirs(folder_path)
+        names = _names_under(self.temp_dir)
+        self.assertNotIn(src_folder, names)
+        self.assertIn(dest_folder, names)
+        self.assertEqual(_names_under(dest_path), {"file1.txt"})
+        self._assert_status(result, ToolCode.OK)
+
+    def test_is_file_and_directory(self):
+        # Одна фикстура для обоих предикатов: файл и папка
+        file_path = self.root + "test_is_file.txt"
+        _tmpfile_write(file_path, self._SMALL)
+        folder_path = self.root + "test_is_dir_folder"
+        _makedirs(folder_path)
 
         # Тест проверки файла
         self.assertTrue(self.tools.is_file(file_path))
         self.assertFalse(self.tools.is_file(folder_path))
-        self.assertFalse(self.tools.is_file(os.path.join(self.temp_dir, "nonexistent.txt")))
-
-    def test_is_directory(self):
-        # Создаем файл для тестирования
-        file_name = "test_is_dir.txt"
-        file_path = os.path.join(self.temp_dir, file_name)
-        with open(file_path, 'w') as f:
-            f.write("Content")
-
-        # Создаем папку для тестирования
-        folder_name = "test_is_dir_folder"
-        folder_path = os.path.join(self.temp_dir, folder_name)
-        os.makedirs(folder_path)
+        self.assertFalse(self.tools.is_file(self.root + "nonexistent.txt"))
 
         # Тест проверки директории
         self.assertTrue(self.tools.is_directory(folder_path))
         self.assertFalse(self.tools.is_directory(file_path))
-        self.assertFalse(self.tools.is_directory(os.path.join(self.temp_dir, "nonexistent_dir")))
+        self.assertFalse(self.tools.is_directory(self.root + "nonexistent_dir"))
+
+        # Некорректный путь не должен приводить к исключению
+        self.assertFalse(self.tools.is_file("invalid\0path"))
+        self.assertFalse(self.tools.is_directory("invalid\0path"))
 
     def test_get_file_metadata(self):
         # Создаем файл для тестирования метаданных
         file_name = "metadata_test.txt"
         content = "This is test content for metadata."
-        file_path = Path(self.temp_dir) / file_name
-        with file_path.open('w') as f:
-            f.write(content)
+        file_path = self.root + file_name
+        _fast_write(file_path, content)
 
-        # Тест получения метаданных
+        # Тест получения метаданных: поля разбираются один раз и сравниваются с os.stat
         metadata = self.tools.get_file_metadata(file_name)
         self.assertIsInstance(metadata, str)
-        self.assertIn(f"size: {len(content)}", metadata)
-        self.assertIn("creation_time:", metadata)
-        self.assertIn("modification_time:", metadata)
-        self.assertIn("access_time:", metadata)
-
-        # Тест получения метаданных несуществующего файла
-        result = self.tools.get_file_metadata("nonexistent_file.txt")
-        self.assertIsInstance(result, str)
-        self.assertIn("does not exist", result)
+        fields = dict(line.split(": ", 1) for line in metadata.split("\n"))
+        self.assertEqual(set(fields), {"size", "creation_time", "modification_time", "access_time"})
+        file_stat = os.stat(file_path)
+        self.assertEqual(int(fields["size"]), file_stat.st_size)
+        self.assertEqual(int(fields["size"]), len(content))
+        self.assertEqual(
+            fields["modification_time"],
+            datetime.datetime.fromtimestamp(file_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+        # Метаданные должны обновляться сразу после записи через инструмент
+        new_content = "Updated content."
+        self.tools.write_to_file(file_name, new_content)
+        metadata = self.tools.get_file_metadata(file_name)
+        self.assertIn(f"size: {len(new_content)}", metadata)
+
+    def test_metadata_after_copy_into_directory(self):
+        # Копирование и перемещение в существующую папку должны сбрасывать кэш для файла внутри нее
+        _makedirs(self.root + "dd")
+        _fast_write(self.root + "dd/s2", b"1")
+        _fast_write(self.root + "s2", b"123456")
+        self.assertIn("size: 1\n", self.tools.get_file_metadata("dd/s2"))
+        self.tools.copy_file("s2", "dd")
+        self.assertIn("size: 6\n", self.tools.get_file_metadata("dd/s2"))
+
+        _fast_write(self.root + "m2", b"12")
+        self.assertIn("size: 2\n", self.tools.get_file_metadata("m2"))
+        self.tools.move_file("m2", "dd")
+        self.assertIn("size: 2\n", self.tools.get_file_metadata("dd/m2"))
+        self._assert_status(self.tools.get_file_metadata("m2"), ToolCode.MISSING)
+
+    def test_metadata_after_move_file_of_directory(self):
+        # move_file с папкой в качестве источника переносит и все вложенные файлы
+        _makedirs(self.root + "dir")
+        _fast_write(self.root + "dir/a.txt", b"abc")
+        self.assertIn("size: 3\n", self.tools.get_file_metadata("dir/a.txt"))
+        self.tools.move_file("dir", "dir2")
+        self._assert_status(self.tools.get_file_metadata("dir/a.txt"), ToolCode.MISSING)
+        self.assertIn("size: 3\n", self.tools.get_file_metadata("dir2/a.txt"))
+
+    def test_all_nonexistent(self):
+        # Ветка "не существует" всех инструментов проверяется на одной фикстуре
+        cases = [
+            ("delete_folder", ("nonexistent_folder",)),
+            ("delete_file", ("nonexistent_file.txt",)),
+            ("read_file", ("nonexistent_file.txt",)),
+            ("copy_file", ("nonexistent.txt", "any_dest.txt")),
+            ("copy_folder", ("nonexistent_folder", "any_dest")),
+            ("move_file", ("nonexistent.txt", "any_dest.txt")),
+            ("move_folder", ("nonexistent_folder", "any_dest")),
+            ("get_file_metadata", ("nonexistent_file.txt",)),
+        ]
+        # Путь "через" обычный файл (ENOTDIR) тоже должен считаться несуществующим
+        _fast_write(self.root + "f.txt", self._SMALL)
+        cases += [
+            ("delete_folder", ("f.txt/x",)),
+            ("delete_file", ("f.txt/x",)),
+            ("read_file", ("f.txt/x",)),
+            ("copy_file", ("f.txt/x", "any_dest.txt")),
+            ("copy_folder", ("f.txt/x", "any_dest")),
+            ("move_file", ("f.txt/x", "any_dest.txt")),
+            ("move_folder", ("f.txt/x", "any_dest")),
+            ("get_file_metadata", ("f.txt/x",)),
+        ]
+        for method_name, args in cases:
+            with self.subTest(method=method_name, args=args):
+                result = getattr(self.tools, method_name)(*args)
+                self.assertIsInstance(result, str)
+                self._assert_status(result, ToolCode.MISSING)
+
+    def test_folder_tools_on_file(self):
+        # Существующий файл вместо папки - ошибка, а не "папки не существует"
+        _fast_write(self.root + "f.txt", self._SMALL)
+        with self.assertRaises(NotADirectoryError):
+            self.tools.delete_folder("f.txt")
+        with self.assertRaises(NotADirectoryError):
+            self.tools.copy_folder("f.txt", "any_dest")
+        self.assertTrue(_exists(self.root + "f.txt"))
 
     def test_search_files(self):
-        # Создаем файлы для тестирования поиска
-        file1 = "search_test1.txt"
-        file2 = "another_file.txt"
-        file3 = "subfolder/search_test2.txt"
-
-        os.makedirs(os.path.join(self.temp_dir, "subfolder"))
-
-        with open(os.path.join(self.temp_dir, file1), 'w') as f:
-            f.write("This file contains search keyword")
-
-        with open(os.path.join(self.temp_dir, file2), 'w') as f:
-            f.write("This file does not contain the term")
-
-        with open(os.path.join(self.temp_dir, file3), 'w') as f:
-            f.write("Another file with search keyword")
-
-        # Тест поиска по имени файла
-        results = self.tools.search_files("search")
-        self.assertEqual(len(results), 2)
-        self.assertTrue(any(file1 in r for r in results))
-        self.assertTrue(any(file3 in r for r in results))
-
-        # Тест поиска по содержимому
-        results = self.tools.search_files("keyword")
-        self.assertEqual(len(results), 2)
-
-        # Тест поиска в подпапке
-        results = self.tools.search_files("Another", "subfolder")
-        self.assertEqual(len(results), 1)
+        # Поиск идет по корпусу, созданному один раз в setUpClass
+        file1, _, file3 = self.SEARCH_CORPUS
+        self.tools.base_path = self.search_corpus_dir
+        try:
+            # Тест поиска по имени файла
+            matches = self.tools.search_files("search")
+            self.assertEqual(len(matches), 2)
+            self.assertTrue(any(file1 in r for r in matches))
+            self.assertTrue(any(file3 in r for r in matches))
+
+            # Тест поиска по содержимому
+            matches = self.tools.search_files("keyword")
+            self.assertEqual(len(matches), 2)
+
+            # Тест поиска в подпапке
+            matches = self.tools.search_files("Another", "subfolder")
+            self.assertEqual(len(matches), 1)
+        finally:
+            self.tools.base_path = self.temp_dir
 
 
 if __name__ == "__main__":